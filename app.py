@@ -2,15 +2,22 @@
 """
 IT Asset Inventory Management System - Docker Version
 Web-based interface for containerized deployment
+
+Production (see Dockerfile):
+    gunicorn -k gthread --threads 16 -w 1 -b 0.0.0.0:5000 app:app
+Local development:
+    python app.py
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import sqlite3
+import atexit
 import csv
-import io
 import os
 from datetime import datetime
 import json
+import queue
 import threading
 import time
 
@@ -22,186 +29,462 @@ try:
 except ImportError:
     BARCODE_SUPPORT = False
 
+# For faster JSON serialization (optional)
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+
+# SQL statements, kept as constants so pooled connections reuse their
+# prepared statements from SQLite's statement cache
+SQL_CREATE_ASSETS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS assets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_number TEXT UNIQUE NOT NULL,
+        serial_number TEXT,
+        barcode TEXT UNIQUE,
+        location TEXT,
+        status TEXT,
+        staff_name TEXT,
+        staff_number TEXT,
+        condition TEXT,
+        date_added TIMESTAMP,
+        last_updated TIMESTAMP
+    )
+'''
+SQL_INSERT_ASSET = (
+    "INSERT INTO assets (asset_number, serial_number, barcode, location, status, "
+    "staff_name, staff_number, condition, date_added, last_updated) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# Needs SQLite 3.35+; hands back the stored row from the same statement
+SQL_INSERT_ASSET_RETURNING = SQL_INSERT_ASSET + " RETURNING *"
+SQL_UPDATE_ASSET = (
+    "UPDATE assets SET serial_number = ?, barcode = ?, location = ?, status = ?, "
+    "staff_name = ?, staff_number = ?, condition = ?, last_updated = ? "
+    "WHERE asset_number = ?"
+)
+SQL_SELECT_ASSET_BY_NUMBER = "SELECT * FROM assets WHERE asset_number = ?"
+SQL_SELECT_ASSET_BY_BARCODE = "SELECT * FROM assets WHERE barcode = ?"
+SQL_SELECT_ALL_ASSETS = "SELECT * FROM assets ORDER BY asset_number"
+SQL_SELECT_FIRST_ASSETS_PAGE = "SELECT * FROM assets ORDER BY asset_number LIMIT ?"
+SQL_SELECT_ASSETS_PAGE = (
+    "SELECT * FROM assets WHERE asset_number > ? ORDER BY asset_number LIMIT ?"
+)
+SQL_DELETE_ASSET = "DELETE FROM assets WHERE asset_number = ?"
+
+# Store datetimes as "YYYY-MM-DD HH:MM:SS" and read TIMESTAMP columns back
+# as datetime objects
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' ', timespec='seconds'))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode('utf-8')))
+
+def json_default(obj):
+    """Encode datetimes as ISO 8601 strings, matching orjson"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json(obj):
+    """Serialize obj to compact JSON bytes, using orjson when available"""
+    if ORJSON_SUPPORT:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), default=json_default).encode('utf-8')
+
+class ConnectionPool:
+    """Thread-local pool of long-lived SQLite connections"""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Every connection handed out, keyed by its owning thread
+        self._connections = {}
+    
+    def _create_connection(self):
+        """Open a new connection; transactions are managed explicitly"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               isolation_level=None,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside a single writer
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-20000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=134217728')
+        return conn
+    
+    def connect(self):
+        """Return the calling thread's connection, creating it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            with self._lock:
+                # Reclaim connections left behind by finished threads
+                for thread, stale in list(self._connections.items()):
+                    if not thread.is_alive():
+                        stale.close()
+                        del self._connections[thread]
+                self._connections[threading.current_thread()] = conn
+        return conn
+    
+    def close_all(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+            self._local = threading.local()
+
 class AssetDatabase:
+    # Cached /api/assets bodies kept before the cache is reset
+    MAX_CACHED_BODIES = 256
+    
     def __init__(self, db_path="/app/data/asset_inventory.db"):
         self.db_path = db_path
         # Ensure directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._pool = ConnectionPool(db_path)
+        # Serialized /api/assets bodies keyed by page, valid until the next write
+        self._cache_lock = threading.Lock()
+        self._version = 0
+        self._cached_json = {}
         self.init_database()
     
     def init_database(self):
         """Initialize the SQLite database with assets table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                asset_number TEXT UNIQUE NOT NULL,
-                serial_number TEXT,
-                barcode TEXT UNIQUE,
-                location TEXT,
-                status TEXT,
-                staff_name TEXT,
-                staff_number TEXT,
-                condition TEXT,
-                date_added TEXT,
-                last_updated TEXT
-            )
-        ''')
+        cursor.execute(SQL_CREATE_ASSETS_TABLE)
+        self._migrate_timestamp_columns(cursor)
+
+        # asset_number and barcode are already indexed via UNIQUE
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_assets_serial ON assets(serial_number)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_assets_staff ON assets(staff_number)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_assets_location ON assets(location)')
+        cursor.execute('ANALYZE')
+
+    def _migrate_timestamp_columns(self, cursor):
+        """Rebuild tables created before the date columns were TIMESTAMP"""
+        columns = {row['name']: row['type'] for row in cursor.execute('PRAGMA table_info(assets)')}
+        if columns.get('date_added') == 'TIMESTAMP':
+            return
         
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('BEGIN')
+            cursor.execute('ALTER TABLE assets RENAME TO assets_old')
+            cursor.execute(SQL_CREATE_ASSETS_TABLE)
+            cursor.execute('INSERT INTO assets SELECT * FROM assets_old')
+            cursor.execute('DROP TABLE assets_old')
+            cursor.execute('COMMIT')
+        finally:
+            if cursor.connection.in_transaction:
+                cursor.execute('ROLLBACK')
     
     def add_asset(self, asset_data):
-        """Add new asset to database"""
-        conn = sqlite3.connect(self.db_path)
+        """Add new asset to database and return the stored row"""
+        conn = self._pool.connect()
+        cursor = conn.cursor()
+        
+        try:
+            current_time = datetime.now()
+            cursor.execute('BEGIN')
+            asset = dict(cursor.execute(SQL_INSERT_ASSET_RETURNING,
+                                        (*asset_data, current_time, current_time)).fetchone())
+            
+            cursor.execute('COMMIT')
+            self._invalidate_cache()
+            return {"success": True, "message": "Asset added successfully", "asset": asset}
+        except sqlite3.IntegrityError as e:
+            return {"success": False, "message": f"Error: {str(e)}"}
+        finally:
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+    
+    def add_assets_bulk(self, assets_data):
+        """Add many assets in a single transaction"""
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
         try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
-                INSERT INTO assets 
-                (asset_number, serial_number, barcode, location, status, 
-                 staff_name, staff_number, condition, date_added, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (*asset_data, current_time, current_time))
+            current_time = datetime.now()
+            cursor.execute('BEGIN')
+            cursor.executemany(SQL_INSERT_ASSET, [(*asset_data, current_time, current_time) for asset_data in assets_data])
             
-            conn.commit()
-            return {"success": True, "message": "Asset added successfully"}
+            cursor.execute('COMMIT')
+            self._invalidate_cache()
+            return {"success": True, "message": f"{len(assets_data)} assets added successfully"}
         except sqlite3.IntegrityError as e:
             return {"success": False, "message": f"Error: {str(e)}"}
         finally:
-            conn.close()
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
     
     def update_asset(self, asset_number, asset_data):
         """Update existing asset"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
         try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
-                UPDATE assets SET
-                serial_number = ?, barcode = ?, location = ?, status = ?,
-                staff_name = ?, staff_number = ?, condition = ?, last_updated = ?
-                WHERE asset_number = ?
-            ''', (*asset_data[1:], current_time, asset_number))
+            current_time = datetime.now()
+            cursor.execute('BEGIN')
+            cursor.execute(SQL_UPDATE_ASSET, (*asset_data[1:], current_time, asset_number))
             
-            conn.commit()
             success = cursor.rowcount > 0
+            cursor.execute('COMMIT')
+            self._invalidate_cache()
             return {"success": success, "message": "Asset updated successfully" if success else "Asset not found"}
         finally:
-            conn.close()
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
     
     def get_asset(self, asset_number=None, barcode=None):
         """Retrieve asset by asset number or barcode"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
         if asset_number:
-            cursor.execute('SELECT * FROM assets WHERE asset_number = ?', (asset_number,))
+            cursor.execute(SQL_SELECT_ASSET_BY_NUMBER, (asset_number,))
         elif barcode:
-            cursor.execute('SELECT * FROM assets WHERE barcode = ?', (barcode,))
+            cursor.execute(SQL_SELECT_ASSET_BY_BARCODE, (barcode,))
         else:
             return None
         
         result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                "id": result[0],
-                "asset_number": result[1],
-                "serial_number": result[2],
-                "barcode": result[3],
-                "location": result[4],
-                "status": result[5],
-                "staff_name": result[6],
-                "staff_number": result[7],
-                "condition": result[8],
-                "date_added": result[9],
-                "last_updated": result[10]
-            }
-        return None
-    
-    def get_all_assets(self):
-        """Retrieve all assets"""
-        conn = sqlite3.connect(self.db_path)
+        return dict(result) if result else None
+    
+    def get_all_assets(self, limit=None, after_asset_number=None):
+        """Retrieve all assets, or one page of them keyed by asset number"""
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM assets ORDER BY asset_number')
-        results = cursor.fetchall()
-        conn.close()
+        if limit is None:
+            cursor.execute(SQL_SELECT_ALL_ASSETS)
+        elif after_asset_number is None:
+            cursor.execute(SQL_SELECT_FIRST_ASSETS_PAGE, (limit,))
+        else:
+            cursor.execute(SQL_SELECT_ASSETS_PAGE, (after_asset_number, limit))
+        return [dict(result) for result in cursor]
+    
+    def get_assets_page(self, limit, after_asset_number=None):
+        """Retrieve one page of assets plus the cursor for the next page"""
+        assets = self.get_all_assets(limit, after_asset_number)
+        next_cursor = assets[-1]['asset_number'] if len(assets) == limit else None
+        return {"assets": assets, "next_cursor": next_cursor}
+    
+    def get_all_assets_json(self, limit=None, after_asset_number=None):
+        """Retrieve all assets (or one page) as a JSON body, cached between writes"""
+        key = (limit, after_asset_number)
+        with self._cache_lock:
+            body = self._cached_json.get(key)
+            if body is not None:
+                return body
+            version = self._version
         
-        assets = []
-        for result in results:
-            assets.append({
-                "id": result[0],
-                "asset_number": result[1],
-                "serial_number": result[2],
-                "barcode": result[3],
-                "location": result[4],
-                "status": result[5],
-                "staff_name": result[6],
-                "staff_number": result[7],
-                "condition": result[8],
-                "date_added": result[9],
-                "last_updated": result[10]
-            })
-        return assets
+        if limit is None:
+            data = self.get_all_assets()
+        else:
+            data = self.get_assets_page(limit, after_asset_number)
+        body = dumps_json(data)
+        with self._cache_lock:
+            # Don't cache a snapshot that a concurrent write has already superseded
+            if self._version == version:
+                if len(self._cached_json) >= self.MAX_CACHED_BODIES:
+                    self._cached_json.clear()
+                self._cached_json[key] = body
+        return body
+    
+    def _invalidate_cache(self):
+        """Drop the cached JSON body after a write"""
+        with self._cache_lock:
+            self._version += 1
+            self._cached_json = {}
+    
+    def iter_assets(self):
+        """Yield assets one row at a time without loading the whole table"""
+        conn = self._pool.connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(SQL_SELECT_ALL_ASSETS)
+        yield from cursor
     
     def delete_asset(self, asset_number):
         """Delete asset from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._pool.connect()
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM assets WHERE asset_number = ?', (asset_number,))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return {"success": success, "message": "Asset deleted successfully" if success else "Asset not found"}
+        try:
+            cursor.execute('BEGIN')
+            cursor.execute(SQL_DELETE_ASSET, (asset_number,))
+            success = cursor.rowcount > 0
+            cursor.execute('COMMIT')
+            self._invalidate_cache()
+            return {"success": success, "message": "Asset deleted successfully" if success else "Asset not found"}
+        finally:
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+    
+    def close(self):
+        """Close all pooled database connections"""
+        self._pool.close_all()
 
 class BarcodeScanner:
+    # Only decode every Nth frame; the rest are grabbed and discarded
+    DECODE_EVERY_N_FRAMES = 3
+    # Seconds to wait for a barcode, and how old a hit may be to still count
+    SCAN_TIMEOUT = 5
+    RECENT_SCAN_WINDOW = 1
+    
     def __init__(self):
         self.scanning = False
         self.camera = None
         self.last_scan = None
+        self.result_queue = queue.Queue(maxsize=10)
+        self._camera_ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        """Start the capture thread if it is not already running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._camera_ready.clear()
+            self.scanning = True
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the capture thread and release the camera"""
+        self.scanning = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+    
+    def _loop(self):
+        """Capture frames continuously and queue every decoded barcode"""
+        camera = cv2.VideoCapture(0)
+        if not camera.isOpened():
+            self.scanning = False
+            self._camera_ready.set()
+            return
+        
+        # 480p MJPEG is cheap to decode and plenty for pyzbar
+        camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.camera = camera
+        self._camera_ready.set()
+        
+        frame_count = 0
+        try:
+            while self.scanning:
+                # grab() advances the stream without decoding the frame;
+                # a failure means the device went away, so let start() reopen it
+                if not camera.grab():
+                    break
+                frame_count += 1
+                if frame_count % self.DECODE_EVERY_N_FRAMES != 0:
+                    continue
+                
+                ret, frame = camera.retrieve()
+                if not ret:
+                    continue
+                
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                barcodes = self._decode(gray)
+                if barcodes:
+                    self._publish(barcodes[0].data.decode('utf-8'))
+        finally:
+            self.scanning = False
+            self.camera = None
+            camera.release()
+    
+    def _decode(self, gray):
+        """Decode a grayscale frame, trying a binarized copy first"""
+        _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        barcodes = pyzbar.decode(bw) or pyzbar.decode(gray)
+        if not barcodes:
+            # Light-on-dark codes only decode once inverted
+            barcodes = pyzbar.decode(cv2.bitwise_not(bw))
+        return barcodes
+    
+    def _publish(self, barcode_data):
+        """Queue a decoded barcode, dropping the oldest hit when full"""
+        self.last_scan = (time.time(), barcode_data)
+        try:
+            self.result_queue.put_nowait(self.last_scan)
+        except queue.Full:
+            try:
+                self.result_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.result_queue.put_nowait(self.last_scan)
     
     def scan_once(self):
-        """Single barcode scan attempt"""
+        """Wait for the next barcode seen by the capture thread"""
         if not BARCODE_SUPPORT:
             return {"success": False, "message": "Barcode scanning not available"}
         
-        camera = cv2.VideoCapture(0)
-        if not camera.isOpened():
+        requested_at = time.time()
+        self.start()
+        self._camera_ready.wait(timeout=self.SCAN_TIMEOUT)
+        if not self.scanning:
             return {"success": False, "message": "Could not access camera"}
         
-        # Try to scan for 5 seconds
-        start_time = time.time()
-        while time.time() - start_time < 5:
-            ret, frame = camera.read()
-            if not ret:
-                continue
-            
-            barcodes = pyzbar.decode(frame)
-            for barcode in barcodes:
-                barcode_data = barcode.data.decode('utf-8')
-                camera.release()
+        # Skip hits that were queued well before this request
+        deadline = requested_at + self.SCAN_TIMEOUT
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                scanned_at, barcode_data = self.result_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if scanned_at >= requested_at - self.RECENT_SCAN_WINDOW:
                 return {"success": True, "barcode": barcode_data}
-            
-            time.sleep(0.1)
         
-        camera.release()
         return {"success": False, "message": "No barcode detected"}
 
+class _EchoBuffer:
+    """File-like object that hands back whatever csv.writer writes to it"""
+    def write(self, value):
+        return value
+
+class AssetJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that writes datetimes as ISO 8601"""
+    @staticmethod
+    def default(o):
+        if isinstance(o, datetime):
+            return json_default(o)
+        return DefaultJSONProvider.default(o)
+
+class ORJSONProvider(AssetJSONProvider):
+    """Flask JSON provider backed by orjson"""
+    def dumps(self, obj, **kwargs):
+        # Fall back to Flask's handling for types orjson doesn't know
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Flask Application
 app = Flask(__name__)
+app.json = ORJSONProvider(app) if ORJSON_SUPPORT else AssetJSONProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
 
+# Page sizes for /api/assets?limit=&cursor=
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 # Initialize database
 db = AssetDatabase()
+atexit.register(db.close)
 scanner = BarcodeScanner()
+atexit.register(scanner.stop)
 
 @app.route('/')
 def index():
@@ -210,9 +493,15 @@ def index():
 
 @app.route('/api/assets', methods=['GET'])
 def get_assets():
-    """Get all assets"""
-    assets = db.get_all_assets()
-    return jsonify(assets)
+    """Get all assets, or one page when limit/cursor are given"""
+    limit = request.args.get('limit', type=int)
+    after_asset_number = request.args.get('cursor')
+    if limit is None and after_asset_number is None:
+        return Response(db.get_all_assets_json(), mimetype='application/json')
+    
+    limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    return Response(db.get_all_assets_json(limit, after_asset_number),
+                    mimetype='application/json')
 
 @app.route('/api/assets', methods=['POST'])
 def add_asset():
@@ -232,6 +521,30 @@ def add_asset():
     result = db.add_asset(asset_data)
     return jsonify(result)
 
+@app.route('/api/assets/bulk', methods=['POST'])
+def add_assets_bulk():
+    """Add a JSON array of assets in one transaction"""
+    data = request.json
+    if not isinstance(data, list):
+        return jsonify({"success": False, "message": "Expected a JSON array of assets"}), 400
+    
+    assets_data = [
+        (
+            item.get('asset_number', ''),
+            item.get('serial_number', ''),
+            item.get('barcode', ''),
+            item.get('location', ''),
+            item.get('status', ''),
+            item.get('staff_name', ''),
+            item.get('staff_number', ''),
+            item.get('condition', '')
+        )
+        for item in data
+    ]
+    
+    result = db.add_assets_bulk(assets_data)
+    return jsonify(result)
+
 @app.route('/api/assets/<asset_number>', methods=['GET'])
 def get_asset(asset_number):
     """Get specific asset"""
@@ -281,30 +594,26 @@ def scan_barcode():
 @app.route('/api/export', methods=['GET'])
 def export_csv():
     """Export assets to CSV"""
-    assets = db.get_all_assets()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Asset Number', 'Serial Number', 'Barcode', 'Location', 
-                    'Status', 'Staff Name', 'Staff Number', 'Condition', 
-                    'Date Added', 'Last Updated'])
-    
-    # Write data
-    for asset in assets:
-        writer.writerow([
-            asset['asset_number'], asset['serial_number'], asset['barcode'],
-            asset['location'], asset['status'], asset['staff_name'],
-            asset['staff_number'], asset['condition'], asset['date_added'],
-            asset['last_updated']
-        ])
-    
-    output.seek(0)
+    def generate():
+        writer = csv.writer(_EchoBuffer())
+        
+        # Write header
+        yield writer.writerow(['Asset Number', 'Serial Number', 'Barcode', 'Location', 
+                              'Status', 'Staff Name', 'Staff Number', 'Condition', 
+                              'Date Added', 'Last Updated'])
+        
+        # Write data one row at a time straight from the cursor
+        for asset in db.iter_assets():
+            yield writer.writerow([
+                asset['asset_number'], asset['serial_number'], asset['barcode'],
+                asset['location'], asset['status'], asset['staff_name'],
+                asset['staff_number'], asset['condition'], asset['date_added'],
+                asset['last_updated']
+            ])
     
     # Create response
-    response = app.response_class(
-        output.getvalue(),
+    response = Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': 'attachment; filename=asset_inventory.csv'}
     )
@@ -315,390 +624,7 @@ def health_check():
     """Health check endpoint for Docker"""
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
-# HTML Template (embedded for single-file deployment)
-@app.before_first_request
-def create_templates():
-    """Create templates directory and files"""
-    template_dir = "templates"
-    os.makedirs(template_dir, exist_ok=True)
-    
-    html_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>IT Asset Inventory</title>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/bootstrap/5.1.3/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        .scanner-section { background-color: #f8f9fa; border-radius: 10px; }
-        .asset-form { background-color: white; border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-        .table-container { max-height: 500px; overflow-y: auto; }
-        .status-available { color: #28a745; }
-        .status-assigned { color: #007bff; }
-        .status-repair { color: #ffc107; }
-        .status-retired { color: #6c757d; }
-    </style>
-</head>
-<body>
-    <div class="container-fluid py-4">
-        <div class="row">
-            <div class="col-12">
-                <h1 class="text-center mb-4"><i class="fas fa-laptop"></i> IT Asset Inventory System</h1>
-            </div>
-        </div>
-
-        <!-- Barcode Scanner Section -->
-        {% if barcode_support %}
-        <div class="row mb-4">
-            <div class="col-12">
-                <div class="scanner-section p-3">
-                    <h4><i class="fas fa-qrcode"></i> Barcode Scanner</h4>
-                    <button id="scanBtn" class="btn btn-primary me-2">
-                        <i class="fas fa-camera"></i> Scan Barcode
-                    </button>
-                    <span id="scanStatus" class="text-muted">Ready to scan</span>
-                </div>
-            </div>
-        </div>
-        {% endif %}
-
-        <div class="row">
-            <!-- Asset Entry Form -->
-            <div class="col-lg-4">
-                <div class="asset-form p-4 mb-4">
-                    <h4><i class="fas fa-plus-circle"></i> Asset Entry</h4>
-                    <form id="assetForm">
-                        <div class="mb-3">
-                            <label class="form-label">Asset Number *</label>
-                            <input type="text" class="form-control" id="asset_number" required>
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Serial Number</label>
-                            <input type="text" class="form-control" id="serial_number">
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Barcode</label>
-                            <input type="text" class="form-control" id="barcode">
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Location</label>
-                            <input type="text" class="form-control" id="location">
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Status</label>
-                            <select class="form-select" id="status">
-                                <option value="Available">Available</option>
-                                <option value="Assigned">Assigned</option>
-                                <option value="In Repair">In Repair</option>
-                                <option value="Retired">Retired</option>
-                            </select>
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Staff Name</label>
-                            <input type="text" class="form-control" id="staff_name">
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Staff Number</label>
-                            <input type="text" class="form-control" id="staff_number">
-                        </div>
-                        <div class="mb-3">
-                            <label class="form-label">Condition</label>
-                            <select class="form-select" id="condition">
-                                <option value="Excellent">Excellent</option>
-                                <option value="Good">Good</option>
-                                <option value="Fair">Fair</option>
-                                <option value="Poor">Poor</option>
-                                <option value="Damaged">Damaged</option>
-                            </select>
-                        </div>
-                        <div class="d-grid gap-2">
-                            <button type="submit" class="btn btn-success">
-                                <i class="fas fa-save"></i> Add Asset
-                            </button>
-                            <button type="button" class="btn btn-warning" id="updateBtn" style="display:none;">
-                                <i class="fas fa-edit"></i> Update Asset
-                            </button>
-                            <button type="button" class="btn btn-secondary" id="clearBtn">
-                                <i class="fas fa-eraser"></i> Clear Form
-                            </button>
-                        </div>
-                    </form>
-                </div>
-            </div>
-
-            <!-- Asset List -->
-            <div class="col-lg-8">
-                <div class="asset-form p-4">
-                    <div class="d-flex justify-content-between align-items-center mb-3">
-                        <h4><i class="fas fa-list"></i> Asset Inventory</h4>
-                        <div>
-                            <button class="btn btn-info btn-sm me-2" id="refreshBtn">
-                                <i class="fas fa-sync"></i> Refresh
-                            </button>
-                            <button class="btn btn-success btn-sm" id="exportBtn">
-                                <i class="fas fa-download"></i> Export CSV
-                            </button>
-                        </div>
-                    </div>
-                    <div class="table-container">
-                        <table class="table table-striped table-hover">
-                            <thead class="table-dark sticky-top">
-                                <tr>
-                                    <th>Asset #</th>
-                                    <th>Serial #</th>
-                                    <th>Location</th>
-                                    <th>Status</th>
-                                    <th>Staff</th>
-                                    <th>Condition</th>
-                                    <th>Actions</th>
-                                </tr>
-                            </thead>
-                            <tbody id="assetTableBody">
-                            </tbody>
-                        </table>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <!-- Success/Error Messages -->
-    <div id="alertContainer" class="position-fixed top-0 end-0 p-3" style="z-index: 9999;"></div>
-
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/bootstrap/5.1.3/js/bootstrap.bundle.min.js"></script>
-    <script>
-        let editingAsset = null;
-
-        // Load assets on page load
-        document.addEventListener('DOMContentLoaded', loadAssets);
-
-        // Form submission
-        document.getElementById('assetForm').addEventListener('submit', function(e) {
-            e.preventDefault();
-            if (editingAsset) {
-                updateAsset();
-            } else {
-                addAsset();
-            }
-        });
-
-        // Button event listeners
-        document.getElementById('clearBtn').addEventListener('click', clearForm);
-        document.getElementById('refreshBtn').addEventListener('click', loadAssets);
-        document.getElementById('exportBtn').addEventListener('click', exportCSV);
-        document.getElementById('updateBtn').addEventListener('click', updateAsset);
-
-        {% if barcode_support %}
-        document.getElementById('scanBtn').addEventListener('click', scanBarcode);
-        {% endif %}
-
-        function showAlert(message, type = 'success') {
-            const alertDiv = document.createElement('div');
-            alertDiv.className = `alert alert-${type} alert-dismissible fade show`;
-            alertDiv.innerHTML = `
-                ${message}
-                <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-            `;
-            document.getElementById('alertContainer').appendChild(alertDiv);
-            setTimeout(() => alertDiv.remove(), 5000);
-        }
-
-        function getFormData() {
-            return {
-                asset_number: document.getElementById('asset_number').value,
-                serial_number: document.getElementById('serial_number').value,
-                barcode: document.getElementById('barcode').value,
-                location: document.getElementById('location').value,
-                status: document.getElementById('status').value,
-                staff_name: document.getElementById('staff_name').value,
-                staff_number: document.getElementById('staff_number').value,
-                condition: document.getElementById('condition').value
-            };
-        }
-
-        function populateForm(asset) {
-            document.getElementById('asset_number').value = asset.asset_number || '';
-            document.getElementById('serial_number').value = asset.serial_number || '';
-            document.getElementById('barcode').value = asset.barcode || '';
-            document.getElementById('location').value = asset.location || '';
-            document.getElementById('status').value = asset.status || '';
-            document.getElementById('staff_name').value = asset.staff_name || '';
-            document.getElementById('staff_number').value = asset.staff_number || '';
-            document.getElementById('condition').value = asset.condition || '';
-        }
-
-        function clearForm() {
-            document.getElementById('assetForm').reset();
-            editingAsset = null;
-            document.querySelector('button[type="submit"]').style.display = 'block';
-            document.getElementById('updateBtn').style.display = 'none';
-        }
-
-        async function addAsset() {
-            try {
-                const response = await fetch('/api/assets', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(getFormData())
-                });
-                const result = await response.json();
-                
-                if (result.success) {
-                    showAlert('Asset added successfully!');
-                    clearForm();
-                    loadAssets();
-                } else {
-                    showAlert(result.message, 'danger');
-                }
-            } catch (error) {
-                showAlert('Error adding asset', 'danger');
-            }
-        }
-
-        async function updateAsset() {
-            if (!editingAsset) return;
-            
-            try {
-                const response = await fetch(`/api/assets/${editingAsset}`, {
-                    method: 'PUT',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(getFormData())
-                });
-                const result = await response.json();
-                
-                if (result.success) {
-                    showAlert('Asset updated successfully!');
-                    clearForm();
-                    loadAssets();
-                } else {
-                    showAlert(result.message, 'danger');
-                }
-            } catch (error) {
-                showAlert('Error updating asset', 'danger');
-            }
-        }
-
-        async function loadAssets() {
-            try {
-                const response = await fetch('/api/assets');
-                const assets = await response.json();
-                
-                const tbody = document.getElementById('assetTableBody');
-                tbody.innerHTML = '';
-                
-                assets.forEach(asset => {
-                    const row = tbody.insertRow();
-                    row.innerHTML = `
-                        <td>${asset.asset_number}</td>
-                        <td>${asset.serial_number || '-'}</td>
-                        <td>${asset.location || '-'}</td>
-                        <td><span class="status-${asset.status.toLowerCase().replace(' ', '-')}">${asset.status}</span></td>
-                        <td>${asset.staff_name || '-'}</td>
-                        <td>${asset.condition || '-'}</td>
-                        <td>
-                            <button class="btn btn-sm btn-outline-primary me-1" onclick="editAsset('${asset.asset_number}')">
-                                <i class="fas fa-edit"></i>
-                            </button>
-                            <button class="btn btn-sm btn-outline-danger" onclick="deleteAsset('${asset.asset_number}')">
-                                <i class="fas fa-trash"></i>
-                            </button>
-                        </td>
-                    `;
-                });
-            } catch (error) {
-                showAlert('Error loading assets', 'danger');
-            }
-        }
-
-        async function editAsset(assetNumber) {
-            try {
-                const response = await fetch(`/api/assets/${assetNumber}`);
-                const asset = await response.json();
-                
-                if (asset.asset_number) {
-                    populateForm(asset);
-                    editingAsset = assetNumber;
-                    document.querySelector('button[type="submit"]').style.display = 'none';
-                    document.getElementById('updateBtn').style.display = 'block';
-                }
-            } catch (error) {
-                showAlert('Error loading asset for editing', 'danger');
-            }
-        }
-
-        async function deleteAsset(assetNumber) {
-            if (!confirm(`Are you sure you want to delete asset ${assetNumber}?`)) return;
-            
-            try {
-                const response = await fetch(`/api/assets/${assetNumber}`, {
-                    method: 'DELETE'
-                });
-                const result = await response.json();
-                
-                if (result.success) {
-                    showAlert('Asset deleted successfully!');
-                    loadAssets();
-                } else {
-                    showAlert(result.message, 'danger');
-                }
-            } catch (error) {
-                showAlert('Error deleting asset', 'danger');
-            }
-        }
-
-        {% if barcode_support %}
-        async function scanBarcode() {
-            const scanBtn = document.getElementById('scanBtn');
-            const scanStatus = document.getElementById('scanStatus');
-            
-            scanBtn.disabled = true;
-            scanStatus.textContent = 'Scanning... Point camera at barcode';
-            
-            try {
-                const response = await fetch('/api/scan', { method: 'POST' });
-                const result = await response.json();
-                
-                if (result.success) {
-                    document.getElementById('barcode').value = result.barcode;
-                    scanStatus.textContent = `Scanned: ${result.barcode}`;
-                    
-                    // Try to load existing asset
-                    const assetResponse = await fetch(`/api/assets/search/barcode/${result.barcode}`);
-                    if (assetResponse.ok) {
-                        const asset = await assetResponse.json();
-                        populateForm(asset);
-                        editingAsset = asset.asset_number;
-                        document.querySelector('button[type="submit"]').style.display = 'none';
-                        document.getElementById('updateBtn').style.display = 'block';
-                        showAlert('Existing asset loaded for editing', 'info');
-                    }
-                } else {
-                    scanStatus.textContent = result.message;
-                    showAlert(result.message, 'warning');
-                }
-            } catch (error) {
-                scanStatus.textContent = 'Scan failed';
-                showAlert('Scanning failed', 'danger');
-            } finally {
-                scanBtn.disabled = false;
-                setTimeout(() => {
-                    scanStatus.textContent = 'Ready to scan';
-                }, 3000);
-            }
-        }
-        {% endif %}
-
-        function exportCSV() {
-            window.location.href = '/api/export';
-        }
-    </script>
-</body>
-</html>'''
-    
-    with open(os.path.join(template_dir, 'index.html'), 'w') as f:
-        f.write(html_content)
-
+# Development server only; production runs under gunicorn
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     host = os.environ.get('HOST', '0.0.0.0')